@@ -0,0 +1,382 @@
+"""
+Assigns each parking meter a block face & street side from geometry alone.
+
+Meters are grouped by STREET_NAME, and a street's meters are grouped into
+blocks: meters within block_gap_m of one another share a block, unless they
+don't lie along two straight curbs, and so do the two curbs of a wide street.
+Blocks are numbered in order along the street.
+Each block's meters are projected, in metres, onto the block's own axis, so a
+street that bends, like Mission or Folsom, is measured along each stretch.
+The axis is fitted to the block's meters; where they are too few to show a
+direction, it's taken from the nearest block that does, else the downtown grid
+bearing, defs.meters.dtsf_grid_rotation. Within a block the widest gap across
+the axis is taken as the centerline between the curbs. Blocks with meters on
+one curb only borrow the centerlines of their neighbouring blocks.
+"""
+
+from collections import defaultdict
+from math import atan2, cos, degrees, hypot, radians, sin, sqrt
+from typing import List, Optional, Tuple
+
+from defs.meters import dtsf_grid_rotation
+
+
+block_gap_m = 40.0  # gap between meters that separates one block from the next
+min_street_width_m = 8.0  # across-street gap needed to tell one curb from the other
+max_street_width_m = 60.0  # curbs further apart than this, e.g. The Embarcadero's, are different streets
+max_curb_skew = 10.0  # degrees two curbs' axes may differ by and still be one block
+min_elongation = 4.0  # major / minor axis variance needed to trust a block's fitted axis
+bearing_search = 15  # degrees either side of a block's axis searched for the clearest gap between its curbs
+max_curb_scatter_m = 3.0  # RMS distance of meters from their curb's line beyond which a block isn't straight
+m_per_deg_lat = 110540.0
+m_per_deg_lon = 111320.0
+
+
+def _axis_diff(a: float, b: float) -> float:
+    d = (a - b) % 180
+    return min(d, 180 - d)
+
+
+def _principal_axis(xy: List[Tuple[float, float]]) -> Tuple[float, float, float]:
+    """
+    Bearing of the points' principal axis, degrees counterclockwise from east
+    in [0, 180), and the points' variance along & across it.
+    """
+    mx = sum(p[0] for p in xy) / len(xy)
+    my = sum(p[1] for p in xy) / len(xy)
+    sxx = sum((p[0] - mx) ** 2 for p in xy)
+    syy = sum((p[1] - my) ** 2 for p in xy)
+    sxy = sum((p[0] - mx) * (p[1] - my) for p in xy)
+    fitted = degrees(0.5 * atan2(2 * sxy, sxx - syy)) % 180
+    spread = sqrt((sxx - syy) ** 2 + 4 * sxy ** 2)
+    return fitted, (sxx + syy + spread) / 2, (sxx + syy - spread) / 2
+
+
+def street_bearing(xy: List[Tuple[float, float]], grid: float = dtsf_grid_rotation) -> Optional[float]:
+    """
+    Angle in degrees, counterclockwise from east, of the axis a block's meters
+    lie along: their fitted axis when they're strung out along one, else the
+    grid axis nearest to it. None for a single meter, which has no axis.
+    >>> round(street_bearing([(-0.1495 * k, k) for k in range(0, 100, 10)]), 1)
+    98.5
+    >>> street_bearing([(0, 0), (8, 1), (1, 9), (9, 8)], grid=11.5)
+    11.5
+    >>> street_bearing([(0, 0)]) is None
+    True
+    """
+    if len(xy) < 2:
+        return None
+    fitted, major, minor = _principal_axis(xy)
+    if major >= min_elongation * minor:
+        return fitted
+    grid_axes = (grid % 180, (grid + 90) % 180)
+    return min(grid_axes, key=lambda a: _axis_diff(a, fitted))
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _link_blocks(xy: List[Tuple[float, float]]) -> List[List[int]]:
+    """
+    Groups points chained together by steps of at most block_gap_m.
+    >>> _link_blocks([(0, 0), (30, 0), (60, 0), (150, 0), (150, 20)])
+    [[0, 1, 2], [3, 4]]
+    """
+    parent = list(range(len(xy)))
+    cells = defaultdict(list)
+    for i, (x, y) in enumerate(xy):
+        cells[(int(x // block_gap_m), int(y // block_gap_m))].append(i)
+    for (cx, cy), members in cells.items():
+        near = [j for dx in (-1, 0, 1) for dy in (-1, 0, 1) for j in cells.get((cx + dx, cy + dy), ())]
+        for i in members:
+            for j in near:
+                if i < j and hypot(xy[i][0] - xy[j][0], xy[i][1] - xy[j][1]) <= block_gap_m:
+                    parent[_find(parent, j)] = _find(parent, i)
+    groups = defaultdict(list)
+    for i in range(len(xy)):
+        groups[_find(parent, i)].append(i)
+    return sorted(groups.values())
+
+
+def _frame(bearing: float) -> Tuple[float, float]:
+    return cos(radians(bearing)), sin(radians(bearing))
+
+
+def _to_frame(p: Tuple[float, float], cs: Tuple[float, float]) -> Tuple[float, float]:
+    """(along, across) coordinates of point :p: in the frame of cos & sin :cs:"""
+    return p[0] * cs[0] + p[1] * cs[1], -p[0] * cs[1] + p[1] * cs[0]
+
+
+def _from_frame(along: float, across: float, cs: Tuple[float, float]) -> Tuple[float, float]:
+    return along * cs[0] - across * cs[1], along * cs[1] + across * cs[0]
+
+
+def _merge_curbs(blocks: List[List[int]], xy: List[Tuple[float, float]]) -> List[List[int]]:
+    """
+    Joins blocks that are the opposite curbs of a street too wide for
+    _link_blocks to bridge: parallel, side by side, and no more than
+    max_street_width_m apart.
+    """
+    fits = [_principal_axis([xy[i] for i in m]) if len(m) > 1 else None for m in blocks]
+    parent = list(range(len(blocks)))
+    for a, b in ((a, b) for a in range(len(blocks)) for b in range(a + 1, len(blocks))):
+        if fits[a] is None or fits[b] is None or _axis_diff(fits[a][0], fits[b][0]) > max_curb_skew:
+            continue
+        cs = _frame(fits[a][0])
+        pa = [_to_frame(xy[i], cs) for i in blocks[a]]
+        pb = [_to_frame(xy[i], cs) for i in blocks[b]]
+        overlap = min(max(p[0] for p in pa), max(p[0] for p in pb)) - max(min(p[0] for p in pa), min(p[0] for p in pb))
+        offset = abs(sum(p[1] for p in pa) / len(pa) - sum(p[1] for p in pb) / len(pb))
+        if overlap > 0 and offset <= max_street_width_m:
+            parent[_find(parent, b)] = _find(parent, a)
+    merged = defaultdict(list)
+    for k, members in enumerate(blocks):
+        merged[_find(parent, k)].extend(members)
+    return [sorted(m) for m in merged.values()]
+
+
+def _curb_scatter(xy: List[Tuple[float, float]]) -> Tuple[float, Tuple[float, float]]:
+    """
+    RMS distance of the points from the lines of their curbs, along the
+    clearest axis, and the frame of that axis.
+    """
+    cs = _frame(_clearest_bearing(xy, _principal_axis(xy)[0]))
+    across = [_to_frame(p, cs)[1] for p in xy]
+    split = _widest_gap_split(across)
+    curbs = [[a for a in across if split is None or (a > split) == pos] for pos in (True, False)]
+    sq = sum((a - sum(c) / len(c)) ** 2 for c in curbs if c for a in c)
+    return sqrt(sq / len(xy)), cs
+
+
+def _straight_runs(members: List[int], xy: List[Tuple[float, float]]) -> List[List[int]]:
+    """
+    Splits a block whose meters don't lie along two straight curbs, as when
+    the blocks either side of a bend are close enough to link, at its widest
+    gap along the street, until each part does.
+    >>> arm = [(d, off) for d in range(16, 100, 8) for off in (-8, 8)]
+    >>> bend = arm + [(-d * 0.6 - off * 0.8, d * 0.8 - off * 0.6) for d, off in arm]
+    >>> [len(run) for run in _straight_runs(list(range(len(bend))), bend)]
+    [22, 22]
+    """
+    if len(members) < 4:
+        return [members]
+    scatter, cs = _curb_scatter([xy[i] for i in members])
+    if scatter <= max_curb_scatter_m:
+        return [members]
+    order = sorted(members, key=lambda i: _to_frame(xy[i], cs)[0])
+    gaps = [_to_frame(xy[b], cs)[0] - _to_frame(xy[a], cs)[0] for a, b in zip(order, order[1:])]
+    cut = max(range(len(gaps)), key=lambda k: gaps[k])
+    if gaps[cut] < min_street_width_m:
+        return [members]
+    return [run for part in (order[:cut + 1], order[cut + 1:]) for run in _straight_runs(sorted(part), xy)]
+
+
+def _centroid(xy: List[Tuple[float, float]], members: List[int]) -> Tuple[float, float]:
+    return (sum(xy[i][0] for i in members) / len(members),
+            sum(xy[i][1] for i in members) / len(members))
+
+
+def _order_blocks(blocks: List[List[int]], xy: List[Tuple[float, float]]) -> List[List[int]]:
+    """
+    Orders blocks along the street, however it bends: from one end, each next
+    block is the nearest one not yet taken. Of the two ends, the street starts
+    at the one that's lower along its overall axis, i.e. further south or west.
+    """
+    if len(blocks) < 2:
+        return blocks
+    cents = [_centroid(xy, m) for m in blocks]
+    mid = _centroid(xy, list(range(len(xy))))
+    dist = lambda p, q: hypot(p[0] - q[0], p[1] - q[1])
+    end = max(range(len(blocks)), key=lambda k: dist(cents[k], mid))
+    other = max(range(len(blocks)), key=lambda k: dist(cents[k], cents[end]))
+    cs = _frame(_principal_axis(xy)[0])
+    if _to_frame(cents[other], cs)[0] < _to_frame(cents[end], cs)[0]:
+        end = other
+    order, todo = [end], set(range(len(blocks))) - {end}
+    while todo:
+        nxt = min(todo, key=lambda k: dist(cents[k], cents[order[-1]]))
+        order.append(nxt)
+        todo.remove(nxt)
+    return [blocks[k] for k in order]
+
+
+def _widest_gap_split(values: List[float]) -> Optional[float]:
+    best, split = _widest_gap(values)
+    return split if best >= min_street_width_m else None
+
+
+def _widest_gap(values: List[float]) -> Tuple[float, Optional[float]]:
+    vals = sorted(values)
+    best, split = 0.0, None
+    for a, b in zip(vals, vals[1:]):
+        if b - a > best:
+            best, split = b - a, (a + b) / 2
+    return best, split
+
+
+def _clearest_bearing(xy: List[Tuple[float, float]], bearing: float) -> float:
+    """
+    The bearing, within bearing_search degrees of :bearing:, across which the
+    gap between the two curbs takes up most of the block's width. A short
+    block with more meters on one curb than the other fits an axis skewed
+    toward its diagonal, which blurs the gap between the curbs.
+    >>> curbs = [(x, -0.1 * x) for x in range(0, 60, 4)] + [(x, 12 - 0.1 * x) for x in range(0, 20, 4)]
+    >>> round(_principal_axis(curbs)[0]), _clearest_bearing(curbs, _principal_axis(curbs)[0]) // 1
+    (165, 174.0)
+    """
+    def clearance(b):
+        cs = _frame(b)
+        across = [_to_frame(p, cs)[1] for p in xy]
+        width = max(across) - min(across)
+        gap = _widest_gap(across)[0]
+        return (gap / width if width else 0.0), gap
+    candidates = [bearing + d for d in sorted(range(-bearing_search, bearing_search + 1), key=abs)]
+    best = max(candidates, key=lambda b: clearance(b)[0])
+    return best % 180 if clearance(best)[1] >= min_street_width_m else bearing
+
+
+def _side_labels(bearing: float) -> Tuple[str, str]:
+    """
+    Compass labels for the (positive, negative) across-street directions.
+    >>> _side_labels(90.0)
+    ('W', 'E')
+    >>> _side_labels(0.0)
+    ('N', 'S')
+    """
+    ax, ay = -sin(radians(bearing)), cos(radians(bearing))
+    if abs(ax) >= abs(ay):
+        return ("E", "W") if ax > 0 else ("W", "E")
+    return ("N", "S") if ay > 0 else ("S", "N")
+
+
+def _neighbour_split(block_num: int, splits: List[Optional[float]], centers: List[float]) -> Optional[float]:
+    """
+    Centerline for a block with meters on one curb only, interpolated from the
+    nearest blocks on either side that have meters on both.
+    >>> _neighbour_split(1, [0.0, None, 4.0], [0.0, 50.0, 100.0])
+    2.0
+    >>> _neighbour_split(2, [1.0, None, None], [0.0, 50.0, 100.0])
+    1.0
+    """
+    before = [b for b in range(block_num) if splits[b] is not None]
+    after = [b for b in range(block_num + 1, len(splits)) if splits[b] is not None]
+    if before and after and centers[after[0]] != centers[before[-1]]:
+        b0, b1 = before[-1], after[0]
+        t = (centers[block_num] - centers[b0]) / (centers[b1] - centers[b0])
+        return splits[b0] + t * (splits[b1] - splits[b0])
+    if before or after:
+        return splits[before[-1] if before else after[0]]
+    return None
+
+
+def _index_street(street: str, xy: List[Tuple[float, float]], grid: float):
+    blocks = [run for block in _link_blocks(xy) for run in _straight_runs(block, xy)]
+    blocks = _order_blocks(_merge_curbs(blocks, xy), xy)
+    fits = [_principal_axis([xy[i] for i in m]) if len(m) > 1 else None for m in blocks]
+    trusted = [k for k, f in enumerate(fits) if f is not None and f[1] >= min_elongation * f[2]]
+    bearings = []
+    for k, members in enumerate(blocks):
+        if trusted:
+            bearings.append(fits[min(trusted, key=lambda t: abs(t - k))][0])
+        else:
+            bearings.append(street_bearing([xy[i] for i in members], grid))
+        if bearings[-1] is not None and len(members) > 1:
+            bearings[-1] = _clearest_bearing([xy[i] for i in members], bearings[-1])
+
+    # Each block's centerline as a point & direction, where both curbs have meters
+    frames = [_frame(b) if b is not None else None for b in bearings]
+    lines = []
+    for members, cs in zip(blocks, frames):
+        split = None
+        if cs is not None:
+            split = _widest_gap_split([_to_frame(xy[i], cs)[1] for i in members])
+        if split is None:
+            lines.append(None)
+        else:
+            along = sum(_to_frame(xy[i], cs)[0] for i in members) / len(members)
+            lines.append((_from_frame(along, split, cs), cs))
+
+    faces, sides = [""] * len(xy), [""] * len(xy)
+    for block_num, (members, cs) in enumerate(zip(blocks, frames)):
+        split = None
+        if cs is not None:
+            # Neighbouring centerlines, extended to this block & measured in its frame
+            center = _to_frame(_centroid(xy, members), cs)
+            centers, splits = [], []
+            for line, other in zip(lines, blocks):
+                if line is None:
+                    centers.append(_to_frame(_centroid(xy, other), cs)[0])
+                    splits.append(None)
+                    continue
+                (px, py), (lc, ls) = line
+                gx, gy = _centroid(xy, members)
+                t = (gx - px) * lc + (gy - py) * ls
+                near = _to_frame((px + t * lc, py + t * ls), cs)
+                centers.append(near[0])
+                splits.append(near[1])
+            centers[block_num] = center[0]
+            split = splits[block_num] if lines[block_num] else _neighbour_split(block_num, splits, centers)
+        if split is not None:
+            pos_label, neg_label = _side_labels(bearings[block_num])
+        for i in members:
+            if split is not None:
+                sides[i] = pos_label if _to_frame(xy[i], cs)[1] > split else neg_label
+            faces[i] = f"{street}:{block_num}{sides[i]}"
+    return faces, sides
+
+
+def block_face_index(street_names: List[str], points: List[Optional[tuple]],
+                     grid: float = dtsf_grid_rotation) -> Tuple[List[str], List[str]]:
+    """
+    :param street_names: STREET_NAME per meter; meters without one aren't indexed
+    :param points: (lon, lat) per meter, None where unknown
+    :param grid: default street bearing, degrees counterclockwise from east
+    :return: two lists aligned with the inputs: block face ids like "BATTERY ST:3E",
+        and street side "N", "S", "E", "W", or "" where it can't be determined
+
+    Two blocks of a north-south street with meters on both curbs, then a block
+    with meters on its east curb only; and an east-west street of two meters:
+    >>> pts = [(-122.4 + dx, 37.79 + k * 0.00006) for k in list(range(10)) + list(range(20, 30))
+    ...        for dx in (-0.0001, 0.0001)]
+    >>> pts += [(-122.3999, 37.79 + k * 0.00006) for k in range(40, 45)]
+    >>> pts += [(-122.41, 37.8), (-122.4099, 37.8)]
+    >>> faces, sides = block_face_index(["BATTERY ST"] * 45 + ["PINE ST"] * 2, pts)
+    >>> sides[:4], sides[40:45], sides[45:]
+    (['W', 'E', 'W', 'E'], ['E', 'E', 'E', 'E', 'E'], ['', ''])
+    >>> sorted(set(faces))
+    ['BATTERY ST:0E', 'BATTERY ST:0W', 'BATTERY ST:1E', 'BATTERY ST:1W', 'BATTERY ST:2E', 'PINE ST:0']
+
+    A street that bends: three blocks at 99 degrees and three at -135, the
+    last with meters on one curb only. Each curb keeps one side throughout,
+    and meters without a STREET_NAME are left out:
+    >>> def bent(bearing, d, off):
+    ...     c, s = cos(radians(bearing)), sin(radians(bearing))
+    ...     return -122.42 + (d * c - off * s) / 87990, 37.77 + (d * s + off * c) / m_per_deg_lat
+    >>> curbs = [(bearing, off) for bearing in (99, -135) for blk in range(3) for k in range(12)
+    ...          for off in (-8, 8) if bearing == 99 or blk < 2 or off > 0]
+    >>> pts = [bent(bearing, 45 + 140 * (i // 24 % 3) + 8 * (i // 2 % 12), off)
+    ...        for i, (bearing, off) in enumerate(curbs)]
+    >>> faces, sides = block_face_index(["MISSION ST"] * len(pts) + [""], pts + [(-122.42, 37.77)])
+    >>> sorted(set(zip(curbs, sides)))
+    [((-135, -8), 'N'), ((-135, 8), 'S'), ((99, -8), 'E'), ((99, 8), 'W')]
+    >>> len(set(faces[:-1])), faces[-1], sides[-1]
+    (11, '', '')
+    """
+    by_street = defaultdict(list)
+    for i, (street, pt) in enumerate(zip(street_names, points)):
+        if pt is not None and street and street.strip():
+            by_street[street].append(i)
+
+    faces, sides = [""] * len(points), [""] * len(points)
+    for street, idxs in by_street.items():
+        lon0, lat0 = points[idxs[0]]
+        lon_scale = m_per_deg_lon * cos(radians(lat0))
+        xy = [((points[i][0] - lon0) * lon_scale, (points[i][1] - lat0) * m_per_deg_lat) for i in idxs]
+        street_faces, street_sides = _index_street(street, xy, grid)
+        for i, face, side in zip(idxs, street_faces, street_sides):
+            faces[i], sides[i] = face, side
+    return faces, sides
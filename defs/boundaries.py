@@ -1,7 +1,8 @@
 from shapely.geometry import Polygon
 from simplekml import StyleMap
 
-from utils import load_boundary_file, make_stylemap, DictObj
+from kml_styles import make_stylemap
+from utils import load_boundary_file, DictObj
 
 
 class Boundary:
@@ -1,4 +1,4 @@
-from utils import make_stylemap
+from kml_styles import make_stylemap
 
 
 # Based upon https://www.usna.edu/Users/oceano/pguth/md_help/html/approx_equivalents.htm
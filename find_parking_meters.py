@@ -16,7 +16,9 @@ from defs.boundaries import Boundary, boundaries
 from defs.meters import (meter_bb_size, blue_zone_width, blue_zone_length,
                          dtsf_grid_rotation, sqkm2sqmi, blue_zone_color,
                          blue_zone_street_side, meter_colors, meter_desc)
-from utils import rotate2d, load_tsv, make_stylemap, wkt_to_kml, print_cap_dict
+from query import load_table
+from kml_styles import make_stylemap, round_coords
+from utils import rotate2d, load_tsv, wkt_to_kml, print_cap_dict
 
 
 logger = logging.getLogger(__name__)
@@ -34,13 +36,13 @@ def make_meter(x, y, width=meter_bb_size, length=meter_bb_size):
     :return:
     """
     rot_cp = (x, y)
-    return [
+    return round_coords([
         rot_cp,
         rotate2d((x - width, y), dtsf_grid_rotation, rot_cp),
         rotate2d((x - width, y - length), dtsf_grid_rotation, rot_cp),
         rotate2d((x, y - length), dtsf_grid_rotation, rot_cp),
         rot_cp,
-    ]
+    ])
 
 
 def add_blue_zones(doc, bounds):
@@ -81,20 +83,25 @@ def add_meters_to_sansome_qb_map(doc):
     mtype_cbd = defaultdict(int)
     mtypes_battery_east = defaultdict(int)
     mtypes_battery_west = defaultdict(int)
+    mtypes_battery_unknown = defaultdict(int)
     post_ids = defaultdict(int)
-    for pm in load_tsv("data/Parking_Meters.tsv"):
-        p = Point(Decimal(pm["LONGITUDE"]), Decimal(pm["LATITUDE"]))
+    meters = load_table("meters")
+    for pm, pt, side in zip(meters.rows, meters.points, meters.column("STREET_SIDE")):
+        if pt is None:
+            continue
+        p = Point(pt)
         pm_battery = battery.contains(p) and pm["STREET_NAME"] == "BATTERY ST"
         pm_dtsf_cbd = cbd_fidi.contains(p) or cbd_jackson.contains(p)
         pm_battery_adj = battery_adj.contains(p)
         if pm_battery:  # or pm_sansome:
             if pm["CAP_COLOR"].lower() in ("red", "yellow"):
                 post_ids[pm["POST_ID"]] += 1
-            street_num = int(pm['STREET_NUM'])
-            if street_num / 2 == int(street_num / 2):
+            if side == "E":
                 mtypes_battery_east[f'{pm["CAP_COLOR"]}'] += 1
-            else:
+            elif side == "W":
                 mtypes_battery_west[f'{pm["CAP_COLOR"]}'] += 1
+            else:
+                mtypes_battery_unknown[f'{pm["CAP_COLOR"]}'] += 1
             inside_battery_count += 1
             pmp = doc.newpolygon(name=f"{pm['STREET_NUM']} {pm['STREET_NAME']}\n" +
                                       f"Post ID: {pm['POST_ID']}, Space ID: {pm['PARKING_SPACE_ID']}\n" +
@@ -119,6 +126,14 @@ def add_meters_to_sansome_qb_map(doc):
         v = mtypes_battery_west[k]
         print(f"{meter_desc[k]}\t{v}")
 
+    if mtypes_battery_unknown:
+        logger.warning(f"{sum(mtypes_battery_unknown.values())} Battery meters have no street side in the "
+                       f"block face index; they count toward E+W totals, but not East or West alone")
+        print("\nBattery Meters of Unknown Side")
+        for k in sorted(mtypes_battery_unknown.keys()):
+            v = mtypes_battery_unknown[k]
+            print(f"{meter_desc[k]}\t{v}")
+
     print(f"\nInside Battery: {inside_battery_count}")
     print(f"Inside DTSF CBD: {inside_dtsf_cbd_count}")
     print(f"Inside Battery Adjacent: {inside_battery_adj_count}")
@@ -126,7 +141,7 @@ def add_meters_to_sansome_qb_map(doc):
     print("\nDTSF CBD Parking Spaces ALL AFFECTED")
     for k in sorted(mtype_cbd.keys()):
         v = mtype_cbd[k]
-        both = mtypes_battery_west[k] + mtypes_battery_east[k]
+        both = mtypes_battery_west[k] + mtypes_battery_east[k] + mtypes_battery_unknown[k]
         print(f"{meter_desc[k]}\t{v}\t{both}\t{round(both / mtype_cbd[k] * 100, 2)}%")
 
     print("\nDTSF CBD Parking Spaces REMOVED")
@@ -139,7 +154,7 @@ def add_meters_to_sansome_qb_map(doc):
     for k in sorted(mtype_batadj.keys()):
         v = mtype_batadj[k]
         bat_east = mtypes_battery_east[k]
-        both = max(1, mtypes_battery_west[k] + bat_east)
+        both = max(1, mtypes_battery_west[k] + bat_east + mtypes_battery_unknown[k])
         print(f"{meter_desc[k]}\t{v}\t{both}\t{bat_east}\t" +
               f"{round(both / mtype_batadj[k] * 100, 2)}%\t"
               f"{round(bat_east / mtype_batadj[k] * 100, 2)}%")
@@ -153,7 +168,7 @@ def make_battery_sansome_qb_map(name):
 
     for k, b in boundaries.items():
         poly = doc.newpolygon(name=b.n, description=b.n)
-        poly.outerboundaryis = list(b.b.exterior.coords)
+        poly.outerboundaryis = round_coords(b.b.exterior.coords)
         poly.placemark.geometry.outerboundaryis.gxaltitudeoffset = 0
         poly.stylemap = b.c
 
@@ -162,18 +177,24 @@ def make_battery_sansome_qb_map(name):
     return doc
 
 
+skip_rem = ["-"]  # cap colors left out of printed counts & totals
+
+
 def add_meters_in_zone(doc, zone_bdy, also_bdy, make_polys=True, addl_inclusion_fn=None,
                        wanted_caps=None, show_outside=True, wanted_caps_name="Contractor meters"):
     meters_in_color = defaultdict(int)
     meters_out_color = defaultdict(int)
     also_in_color = defaultdict(int)
     also_out_color = defaultdict(int)
-    for pm in load_tsv("data/Parking_Meters.tsv"):
+    meters = load_table("meters")
+    for pm, pt, side in zip(meters.rows, meters.points, meters.column("STREET_SIDE")):
+        if pt is None:
+            continue
         cap = pm["CAP_COLOR"]
-        p = Point(Decimal(pm["LONGITUDE"]), Decimal(pm["LATITUDE"]))
+        p = Point(pt)
         if not wanted_caps or cap in wanted_caps:
             if zone_bdy.contains(p):
-                if not addl_inclusion_fn or addl_inclusion_fn(pm, p):
+                if not addl_inclusion_fn or addl_inclusion_fn(pm, p, side):
                     # print(f"Included: {pm['POST_ID']}")
                     if make_polys:
                         pmp = doc.newpolygon(
@@ -197,7 +218,6 @@ def add_meters_in_zone(doc, zone_bdy, also_bdy, make_polys=True, addl_inclusion_
             else:
                 meters_out_color[cap] += 1
 
-    skip_rem = ["-"]
     dolabs = False
     print_cap_dict(meters_in_color, f"{wanted_caps_name} inside zone" if dolabs else "", meter_desc, skip_rem)
     if show_outside:
@@ -206,11 +226,12 @@ def add_meters_in_zone(doc, zone_bdy, also_bdy, make_polys=True, addl_inclusion_
         print_cap_dict(also_in_color, f"{wanted_caps_name} inside main zone & additional zone" if dolabs else "", meter_desc, skip_rem)
         if show_outside:
             print_cap_dict(also_out_color, f"{wanted_caps_name} inside main zone, but not in additional zone" if dolabs else "", meter_desc, skip_rem)
+    return meters_in_color
 
 
 def add_polyline(doc, boundary, altitude: float = None):
     poly = doc.newpolygon(name=boundary.n, description=boundary.n)
-    poly.outerboundaryis = list(boundary.b.exterior.coords)
+    poly.outerboundaryis = round_coords(boundary.b.exterior.coords)
     poly.placemark.geometry.outerboundaryis.gxaltitudeoffset = boundary.a or altitude
     poly.stylemap = boundary.c
 
@@ -233,7 +254,7 @@ def make_ramp_circle(doc, name, x, y, stylemap, r=meter_bb_size):
         longitude=x, latitude=y, radius=r, number_of_vertices=24)
 
     circle = doc.newpolygon(
-        name=name, outerboundaryis=polycircle.to_kml())
+        name=name, outerboundaryis=round_coords(polycircle.to_kml()))
     circle.placemark.geometry.outerboundaryis.gxaltitudeoffset = 5
     circle.stylemap = stylemap
 
@@ -305,41 +326,44 @@ def paired_areas_all(areas: List[str]):
         paired_areas(boundaries[permu[0]], boundaries[permu[1]])
 
 
-def is_east_or_west_meter(odd_or_even_wanted: bool, meter, point):
+def is_street_side_meter(side_wanted: str, meter, point, side: str):
     """
-    :param odd_or_even_wanted: bool, False==odd, True==even
-    :param meter: for meter["STREET_NUM"]
-    :param point: not used yet
+    :param side_wanted: "N", "S", "E", "W", or "" for meters of unknown side
+    :param meter: not used
+    :param point: not used
+    :param side: the meter's STREET_SIDE, from the block face index
     :return: bool
 
-    Odd STREET_NUM and even wanted
-    >>> bool(3 % 2 ^ True)
-    False
-
-    Odd STREET_NUM and odd wanted
-    >>> bool(3 % 2 ^ False)
-    True
-
-    Even STREET_NUM and even wanted
-    >>> bool(4 % 2 ^ True)
+    >>> is_street_side_meter("E", {"STREET_NUM": "1A"}, None, "E")
     True
-
-    Odd STREET_NUM and odd wanted
-    >>> bool(4 % 2 ^ False)
+    >>> is_street_side_meter("W", {"STREET_NUM": "1A"}, None, "E")
     False
     """
-    return bool(int(meter["STREET_NUM"]) % 2 ^ odd_or_even_wanted)
+    return side == side_wanted
+
+
+side_labels = {"E": "East", "W": "West", "N": "North", "S": "South", "": "Unknown Side"}
 
 
 def meter_counts_by_areas_east_vs_west(areas):
+    """
+    Counts meters per area on the east & west sides of its streets, then on
+    the north & south sides of its cross streets, then those the block face
+    index couldn't place on a curb, so the sides add up to the area's total.
+    """
     doc = K.Kml(name=f"Areas: {', '.join(areas)}")
     for area in areas:
-        for odd_or_even_wanted in (True, False):
-            east_or_west_label = "East" if odd_or_even_wanted else "West"
-            incl_fn = partial(is_east_or_west_meter, odd_or_even_wanted)
-            print(f"\n{boundaries[area].n} {east_or_west_label}")
-            add_meters_in_zone(doc, boundaries[area].b, None, make_polys=True,
-                               addl_inclusion_fn=incl_fn, show_outside=False)
+        area_total = 0
+        for side_wanted, side_label in side_labels.items():
+            incl_fn = partial(is_street_side_meter, side_wanted)
+            print(f"\n{boundaries[area].n} {side_label}")
+            counts = add_meters_in_zone(doc, boundaries[area].b, None, make_polys=True,
+                                        addl_inclusion_fn=incl_fn, show_outside=False)
+            side_total = sum(v for k, v in counts.items() if k not in skip_rem)
+            if not side_wanted and side_total:
+                logger.warning(f"{side_total} meters in {area} have no street side in the block face index")
+            area_total += side_total
+        print(f"\n{boundaries[area].n} All Sides\nTotal: {area_total}")
     return doc
 
 
@@ -0,0 +1,93 @@
+"""
+KML style sharing & coordinate rounding, kept apart from utils so scripts that
+only write KML, like random_test.py, need simplekml but not shapely.
+"""
+
+import random
+
+import simplekml as K
+
+
+kml_coord_precision = 7  # 0.0000001 deg = ~1.1 cm, see defs/meters.py
+line_palette_size = 32
+
+
+def round_coords(coords, precision: int = None):
+    """
+    Rounds each coordinate so KML isn't padded out with float noise like -122.40058000000001
+    :param coords: iterable of (lon, lat) or (lon, lat, alt) tuples
+    :param precision: decimal places, defaults to kml_coord_precision
+    :return: list of tuples
+    >>> round_coords([(-122.40058000000001, 37.795452123)], 5)
+    [(-122.40058, 37.79545)]
+    """
+    if precision is None:
+        precision = kml_coord_precision
+    return [tuple(round(c, precision) for c in pt) for pt in coords]
+
+
+def _new_stylemap(cols_widths: dict):  # norm_col, norm_width, hi_col, hi_width
+    sm = K.StyleMap()
+    norm = K.Style()
+    norm.linestyle.color = cols_widths["ncol"]
+    norm.linestyle.width = cols_widths["nwidth"]
+    norm.polystyle.color = cols_widths["ncol"]
+    norm.polystyle.fill = 1
+    norm.polystyle.outline = 1
+    sm.normalstyle = norm
+    hilite = K.Style()
+    hilite.linestyle.color = cols_widths["hcol"]
+    hilite.linestyle.width = cols_widths["hwidth"]
+    hilite.polystyle.color = cols_widths["hcol"]
+    hilite.polystyle.fill = 1
+    hilite.polystyle.outline = 1
+    sm.highlightstyle = hilite
+    return sm
+
+
+class StyleRegistry:
+    """
+    Hands out one shared simplekml Style or StyleMap per unique set of style
+    parameters. simplekml writes a shared style once, under one id, and every
+    feature using it refers to it by styleUrl.
+    """
+    def __init__(self):
+        self.styles = {}
+
+    def stylemap(self, cols_widths: dict):
+        key = ("stylemap",) + tuple(sorted(cols_widths.items()))
+        if key not in self.styles:
+            self.styles[key] = _new_stylemap(cols_widths)
+        return self.styles[key]
+
+    def linestyle(self, color: str, width: int):
+        key = ("linestyle", color, width)
+        if key not in self.styles:
+            style = K.Style()
+            style.linestyle.color = color
+            style.linestyle.width = width
+            self.styles[key] = style
+        return self.styles[key]
+
+
+style_registry = StyleRegistry()
+
+
+def make_stylemap(cols_widths: dict):  # norm_col, norm_width, hi_col, hi_width
+    return style_registry.stylemap(cols_widths)
+
+
+def _make_line_palette(size, seed=0):
+    r = random.Random(seed)
+    return ['#FF{:02X}{:02X}{:02X}'.format(r.randint(0, 255), r.randint(0, 255), r.randint(0, 255))
+            for _ in range(size)]
+
+
+line_palette = _make_line_palette(line_palette_size)
+
+
+def random_color():
+    """
+    A random pick from a fixed palette, so random line colors still share a few styles
+    """
+    return random.choice(line_palette)
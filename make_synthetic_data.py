@@ -0,0 +1,540 @@
+#!/usr/bin/env python3.10
+"""
+Writes synthetic, schema-faithful stand-ins for the SF Data tables, for
+load-testing the pipeline offline at 10k to 10M rows.
+
+Files use the same names, column headers and leading BOM as the SF Data exports
+in ./data (post_transactions_battery.tsv has neither header nor BOM, as ours
+doesn't), and WKT "POINT (lon lat)" shapes in the form wkt_to_kml() parses.
+Points are sampled inside defs.boundaries polygons, weighted by area, then
+moved to a curb of the nearest of the downtown streets in street_lines, each
+at its real position, so meters line up in block faces on both sides of their
+street with a corner gap at each cross street, and house numbers rise along
+the street with even numbers on the east or north side. Points farther than
+max_snap_m from all of those go to a curb of the nearest street of a grid laid
+out at the downtown grid's bearing, named by its position, e.g. "SYNTH E12 AVE"
+or "SYNTH S3 ST", so any boundary can be filled without piling rows downtown.
+
+Rows are generated and written one at a time, and the same arguments, --seed
+included, always yield the same files.
+
+    $ ./make_synthetic_data.py --rows 1000000 --gzip
+    $ ./make_synthetic_data.py --rows 10000 --datasets meters ramps --within battery_qb cbd_fidi
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import random
+from math import ceil, cos, floor, hypot, radians, sin
+from typing import Callable, List
+
+from shapely.geometry import Point
+from shapely.prepared import prep
+
+from defs.boundaries import boundaries
+from defs.meters import dtsf_grid_rotation
+
+
+logger = logging.getLogger(__name__)
+
+origin = (-122.40, 37.79)  # lon, lat of the local frame, in metres, that streets are laid out in
+m_per_deg_lat = 110540.0
+m_per_deg_lon = 111320.0 * cos(radians(origin[1]))
+curb_offset_m = 6.0  # street centerline to meter; the battery_qb strip is 16 to 22 m wide
+max_snap_m = 80.0  # samples farther than this from every named street go to the synthetic grid
+# Cross street centerline to the nearest meter: ~7 m to the curb of a 14 m downtown roadway,
+# a 3 m crosswalk, and 6 m (20 ft) of no-parking ahead of the crosswalk, per CVC 22500(n)
+corner_clear_m = 16.0
+snap_cell_m = 100.0
+grid_block_m = 120.0  # synthetic grid street spacing, about a downtown block
+grid_first_block = 100  # house numbers of the synthetic grid's block 0, so negative blocks stay positive
+
+# Street centerlines, as (name, (number, lon, lat), (number, lon, lat)), with house numbers
+# interpolated between the two ends. Battery St follows the middle of the battery_qb strip and
+# Sansome St of sansome_qb; the rest are fitted to addresses & coordinates in ./data's permits
+# and blue zones.
+street_lines = [
+    ("DRUMM ST", (100, -122.3966099, 37.7945518), (399, -122.3972716, 37.7972903)),
+    ("FRONT ST", (100, -122.3984919, 37.7927306), (899, -122.4002901, 37.7996780)),
+    ("BATTERY ST", (1, -122.3995198, 37.7909160), (1399, -122.4021385, 37.8041624)),
+    ("SANSOME ST", (1, -122.4005864, 37.7902506), (876, -122.4022450, 37.7984350)),
+    ("MONTGOMERY ST", (1, -122.4019745, 37.7895003), (1799, -122.4054989, 37.8057350)),
+    ("KEARNY ST", (200, -122.4038877, 37.7900787), (1999, -122.4072402, 37.8064918)),
+    ("GRANT AVE", (1, -122.4049536, 37.7870565), (1899, -122.4081956, 37.8045319)),
+    ("STOCKTON ST", (100, -122.4064173, 37.7868091), (2299, -122.4106308, 37.8070348)),
+    ("POWELL ST", (100, -122.4079091, 37.7856718), (2399, -122.4121340, 37.8068837)),
+    ("MASON ST", (100, -122.4093340, 37.7844913), (2699, -122.4139959, 37.8085536)),
+    ("TAYLOR ST", (1, -122.4106677, 37.7824939), (2799, -122.4156385, 37.8082753)),
+    ("JONES ST", (1, -122.4120026, 37.7812634), (2699, -122.4171431, 37.8062719)),
+    ("LEAVENWORTH ST", (100, -122.4139483, 37.7820246), (2899, -122.4190645, 37.8079609)),
+    ("HYDE ST", (1, -122.4153245, 37.7809336), (2799, -122.4206359, 37.8067703)),
+    ("LARKIN ST", (200, -122.4164791, 37.7799451), (3099, -122.4224091, 37.8064408)),
+    ("POLK ST", (700, -122.4193180, 37.7834074), (2999, -122.4233842, 37.8044114)),
+    ("VAN NESS AVE", (500, -122.4203725, 37.7802602), (2899, -122.4248135, 37.8024423)),
+    ("BAY ST", (300, -122.4124418, 37.8059777), (1099, -122.4247314, 37.8043032)),
+    ("FRANCISCO ST", (100, -122.4068443, 37.8055688), (1199, -122.4248979, 37.8031475)),
+    ("CHESTNUT ST", (400, -122.4101511, 37.8043260), (1399, -122.4262897, 37.8021000)),
+    ("LOMBARD ST", (200, -122.4047640, 37.8038068), (1499, -122.4263023, 37.8012000)),
+    ("GREENWICH ST", (100, -122.4013008, 37.8033619), (1599, -122.4260612, 37.8002753)),
+    ("FILBERT ST", (400, -122.4061209, 37.8016924), (1599, -122.4259041, 37.7994604)),
+    ("UNION ST", (1, -122.3995199, 37.8016246), (1599, -122.4256856, 37.7985057)),
+    ("GREEN ST", (1, -122.3992762, 37.8006438), (1299, -122.4205027, 37.7981417)),
+    ("VALLEJO ST", (100, -122.3991263, 37.7998485), (1699, -122.4254893, 37.7965293)),
+    ("BROADWAY", (1, -122.3978209, 37.7991223), (1599, -122.4232268, 37.7957878)),
+    ("PACIFIC AVE", (200, -122.3989013, 37.7979839), (1699, -122.4231233, 37.7949633)),
+    ("JACKSON ST", (100, -122.3969147, 37.7972113), (1899, -122.4264478, 37.7936445)),
+    ("WASHINGTON ST", (100, -122.3953444, 37.7966366), (1999, -122.4261929, 37.7926918)),
+    ("CLAY ST", (200, -122.3975492, 37.7952805), (1799, -122.4223486, 37.7921839)),
+    ("SACRAMENTO ST", (200, -122.3966781, 37.7946823), (1999, -122.4256319, 37.7909680)),
+    ("CALIFORNIA ST", (1, -122.3956364, 37.7938126), (1899, -122.4252206, 37.7900370)),
+    ("PINE ST", (100, -122.3979887, 37.7924672), (1499, -122.4203459, 37.7895829)),
+    ("BUSH ST", (100, -122.3992573, 37.7913917), (1699, -122.4252211, 37.7881004)),
+    ("SUTTER ST", (100, -122.4022499, 37.7900307), (1499, -122.4249764, 37.7872550)),
+    ("POST ST", (1, -122.4020597, 37.7890611), (1399, -122.4246642, 37.7861575)),
+    ("GEARY ST", (1, -122.4033551, 37.7879787), (1099, -122.4214255, 37.7857469)),
+]
+
+opposite_side = {"N": "S", "S": "N", "E": "W", "W": "E"}
+
+# Relative frequency of each meter_colors key
+cap_color_weights = {"Grey": 80, "Yellow": 8, "Green": 5, "Black": 3, "Red": 2, "Blue": 1, "-": 1}
+
+
+def to_metres(lon, lat):
+    return (lon - origin[0]) * m_per_deg_lon, (lat - origin[1]) * m_per_deg_lat
+
+
+def from_metres(x, y):
+    return x / m_per_deg_lon + origin[0], y / m_per_deg_lat + origin[1]
+
+
+class Street:
+    """
+    A straight street centerline, in metres, with house numbers rising from start to end.
+    North-south streets have even numbers on the east side, east-west streets on
+    the north, as in ./data's addresses.
+    """
+    def __init__(self, name, start, end):
+        self.name = name
+        self.num0, self.num1 = start[0], end[0]
+        self.x0, self.y0 = to_metres(start[1], start[2])
+        x1, y1 = to_metres(end[1], end[2])
+        self.length = hypot(x1 - self.x0, y1 - self.y0)
+        self.dx, self.dy = (x1 - self.x0) / self.length, (y1 - self.y0) / self.length
+        north_south = abs(self.dy) > abs(self.dx)
+        if north_south:
+            self.left_side = "W" if self.dy > 0 else "E"
+        else:
+            self.left_side = "S" if self.dx < 0 else "N"
+        self.even_side = "E" if north_south else "N"
+        self.crossings = []  # (along, cross street name), of the streets crossing this one
+
+    def project(self, x, y):
+        """
+        :return: (along, across), the distance along the street from its start, and
+            the distance across it, positive to the left
+        """
+        rx, ry = x - self.x0, y - self.y0
+        return rx * self.dx + ry * self.dy, -rx * self.dy + ry * self.dx
+
+    def distance(self, x, y):
+        along, across = self.project(x, y)
+        return hypot(max(0.0, -along, along - self.length), across)
+
+    def point(self, along, across):
+        return self.x0 + along * self.dx - across * self.dy, self.y0 + along * self.dy + across * self.dx
+
+    def number(self, along, side):
+        num = int(self.num0 + (self.num1 - self.num0) * along / self.length) // 2 * 2
+        num += 0 if side == self.even_side else 1
+        return num if num > 0 else num + 2
+
+
+def _crossing(a: Street, b: Street):
+    """
+    :return: (along a, along b) where the centerlines of a & b meet, or None if parallel
+    """
+    det = a.dx * b.dy - a.dy * b.dx
+    if abs(det) < 1e-9:
+        return None
+    qx, qy = b.x0 - a.x0, b.y0 - a.y0
+    return (qx * b.dy - qy * b.dx) / det, (qx * a.dy - qy * a.dx) / det
+
+
+def make_streets(lines=street_lines, tolerance_m=30.0) -> List[Street]:
+    """
+    Streets from their centerlines, each with the along-street positions of its cross streets.
+    """
+    streets = [Street(*line) for line in lines]
+    for i, a in enumerate(streets):
+        for b in streets[i + 1:]:
+            at = _crossing(a, b)
+            if at and -tolerance_m <= at[0] <= a.length + tolerance_m \
+                    and -tolerance_m <= at[1] <= b.length + tolerance_m:
+                a.crossings.append((at[0], b.name))
+                b.crossings.append((at[1], a.name))
+    return streets
+
+
+class GridStreets:
+    """
+    The synthetic streets of a grid at dtsf_grid_rotation, grid_block_m apart,
+    spanning :bounds: (minx, miny, maxx, maxy in metres). North-south streets are
+    named "SYNTH E<k> AVE" or "SYNTH W<k> AVE" by how many blocks east or west
+    of the origin they are, east-west streets "SYNTH N<k> ST" or "SYNTH S<k> ST",
+    and house numbers rise by 100 per block.
+    """
+    def __init__(self, bounds):
+        self.c, self.s = cos(radians(dtsf_grid_rotation)), sin(radians(dtsf_grid_rotation))
+        minx, miny, maxx, maxy = bounds
+        corners = [self.to_grid(x, y) for x in (minx, maxx) for y in (miny, maxy)]
+        self.u_blocks = (floor(min(u for u, _ in corners) / grid_block_m), ceil(max(u for u, _ in corners) / grid_block_m))
+        self.v_blocks = (floor(min(v for _, v in corners) / grid_block_m), ceil(max(v for _, v in corners) / grid_block_m))
+        self.streets = {}
+
+    def to_grid(self, x, y):
+        return x * self.c + y * self.s, -x * self.s + y * self.c
+
+    def from_grid(self, u, v):
+        return u * self.c - v * self.s, u * self.s + v * self.c
+
+    @staticmethod
+    def name(north_south: bool, k: int) -> str:
+        if north_south:
+            return f"SYNTH {'W' if k < 0 else 'E'}{abs(k)} AVE"
+        return f"SYNTH {'S' if k < 0 else 'N'}{abs(k)} ST"
+
+    def nearest(self, x, y) -> Street:
+        u, v = self.to_grid(x, y)
+        ku, kv = round(u / grid_block_m), round(v / grid_block_m)
+        north_south = abs(u - ku * grid_block_m) <= abs(v - kv * grid_block_m)
+        key = (north_south, ku if north_south else kv)
+        if key not in self.streets:
+            self.streets[key] = self._street(*key)
+        return self.streets[key]
+
+    def _street(self, north_south: bool, k: int) -> Street:
+        b0, b1 = self.v_blocks if north_south else self.u_blocks
+        ends = []
+        for b in (b0, b1):
+            u, v = (k, b) if north_south else (b, k)
+            lon, lat = from_metres(*self.from_grid(u * grid_block_m, v * grid_block_m))
+            ends.append(((grid_first_block + b) * 100, lon, lat))
+        street = Street(self.name(north_south, k), *ends)
+        street.crossings = [((b - b0) * grid_block_m, self.name(not north_south, b)) for b in range(b0, b1 + 1)]
+        return street
+
+
+class CurbPoint:
+    lon: float = None
+    lat: float = None
+    street: str = None
+    cross_street: str = None
+    street_num: int = None
+    side: str = None
+
+    def __init__(self, lon, lat, street, cross_street, street_num, side):
+        self.lon = lon
+        self.lat = lat
+        self.street = street
+        self.cross_street = cross_street
+        self.street_num = street_num
+        self.side = side
+
+
+class CurbSampler:
+    """
+    Samples points on the curbs of streets inside the union of the given
+    boundaries: a uniform point in a boundary is moved to the nearest curb of
+    the nearest named street, or of the nearest GridStreets street if it's more
+    than max_snap_m from every named one. It's dropped, and another sampled, if
+    it's within corner_clear_m of a cross street or its curb is outside the
+    boundary; drawn counts every point sampled, and on_grid those kept on the grid.
+    """
+    def __init__(self, rng: random.Random, boundary_names: List[str], streets: List[Street] = None):
+        self.rng = rng
+        self.polys = [boundaries[n].b for n in boundary_names]
+        self.prepped = [prep(p) for p in self.polys]
+        self.weights = [p.area for p in self.polys]
+        self.streets = streets or make_streets()
+        self._cells = {}
+        bounds = [p.bounds for p in self.polys]
+        self.grid = GridStreets((*to_metres(min(b[0] for b in bounds), min(b[1] for b in bounds)),
+                                 *to_metres(max(b[2] for b in bounds), max(b[3] for b in bounds))))
+        self.drawn = 0
+        self.kept = 0
+        self.on_grid = 0
+
+    def _uniform(self, idx):
+        minx, miny, maxx, maxy = self.polys[idx].bounds
+        while True:
+            lon, lat = self.rng.uniform(minx, maxx), self.rng.uniform(miny, maxy)
+            if self.prepped[idx].contains(Point(lon, lat)):
+                return lon, lat
+
+    def _candidates(self, x, y) -> List[Street]:
+        """
+        Streets that may be within max_snap_m of a point, memoized per snap_cell_m square.
+        """
+        cell = (int(x // snap_cell_m), int(y // snap_cell_m))
+        if cell not in self._cells:
+            cx, cy = (cell[0] + 0.5) * snap_cell_m, (cell[1] + 0.5) * snap_cell_m
+            reach = max_snap_m + snap_cell_m * 0.71
+            self._cells[cell] = [s for s in self.streets if s.distance(cx, cy) <= reach]
+        return self._cells[cell]
+
+    def sample(self) -> CurbPoint:
+        while True:
+            self.drawn += 1
+            idx = self.rng.choices(range(len(self.polys)), self.weights)[0]
+            x, y = to_metres(*self._uniform(idx))
+            near = [(s.distance(x, y), s) for s in self._candidates(x, y)]
+            dist, street = min(near, key=lambda d: d[0]) if near else (None, None)
+            along = street.project(x, y)[0] if street else None
+            on_grid = dist is None or dist > max_snap_m or not 0 <= along <= street.length
+            if on_grid:
+                street = self.grid.nearest(x, y)
+                along = street.project(x, y)[0]
+            if any(abs(along - c) < corner_clear_m for c, _ in street.crossings):
+                continue
+            left = self.rng.random() < 0.5
+            side = street.left_side if left else opposite_side[street.left_side]
+            lon, lat = from_metres(*street.point(along, curb_offset_m if left else -curb_offset_m))
+            if not self.prepped[idx].contains(Point(lon, lat)):
+                continue
+            cross = min(street.crossings, key=lambda c: abs(c[0] - along))[1] if street.crossings else ""
+            self.kept += 1
+            self.on_grid += on_grid
+            return CurbPoint(round(lon, 7), round(lat, 7), street.name, cross, street.number(along, side), side)
+
+
+def post_id(i: int) -> str:
+    return f"{300 + i // 100000:03d}-{i % 100000:05d}"
+
+
+def wkt_point(cp: CurbPoint) -> str:
+    return f"POINT ({cp.lon} {cp.lat})"
+
+
+def district(rng: random.Random) -> str:
+    return str(rng.choice((3, 3, 3, 6, 2)))
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{rng.randint(2017, 2022)}"
+
+
+def meter_row(rng, i, cp):
+    cap = rng.choices(list(cap_color_weights), list(cap_color_weights.values()))[0]
+    return {
+        "POST_ID": post_id(i),
+        "PARKING_SPACE_ID": str(i + 1),
+        "ACTIVE_METER_FLAG": "M",
+        "SMART_METER_FLAG": rng.choice(("Y", "N")),
+        "METER_TYPE": "MS" if cap == "Black" else "SS",
+        "CAP_COLOR": cap,
+        "STREET_NUM": str(cp.street_num),
+        "STREET_NAME": cp.street,
+        "LONGITUDE": str(cp.lon),
+        "LATITUDE": str(cp.lat),
+        "Current Supervisor Districts": district(rng),
+    }
+
+
+def blue_zone_row(rng, i, cp):
+    return {
+        "OBJECTID": str(i + 1),
+        "ADDRESS": f"{cp.street_num} {cp.street.title()}",
+        "CROSSST": cp.cross_street.title(),
+        "SITEDETAIL": f"{cp.street_num} {cp.street.title()}",
+        "SPACELENG": str(rng.choice((18, 20, 22, 24))),
+        "STSIDE": cp.side,
+        "POSTID": post_id(rng.randrange(max(i, 1))),
+        "shape": wkt_point(cp),
+        "Current Police Districts": "6",
+        "Current Supervisor Districts": district(rng),
+    }
+
+
+def ramp_row(rng, i, cp):
+    yn = lambda: rng.choice(("Y", "N"))
+    return {
+        "ocID": str(i + 1),
+        "positionOnReturn": rng.choice(("Left", "Right", "Center")),
+        "conditionScore": str(rng.randint(0, 100)),
+        "crExist": yn(),
+        "crPossible": yn(),
+        "curbReturnLoc": rng.choice(("NE", "NW", "SE", "SW")),
+        "detectableSurf": yn(),
+        "flushToCorner": yn(),
+        "heavyTraffic": yn(),
+        "insideCrosswalk": yn(),
+        "levelLandBottom": yn(),
+        "levelLandTop": yn(),
+        "lipTooHigh": yn(),
+        "Latitude": str(cp.lat),
+        "Longitude": str(cp.lon),
+    }
+
+
+def permit_row(rng, i, cp):
+    start = _date(rng)
+    return {
+        "DateTimeEntered": f"{start} 08:00:00 AM",
+        "Category": rng.choice(("Construction - Private", "Construction - City Agency")),
+        "Source": "StreetSpaceRequest",
+        "SignType": "DBI",
+        "CompanyName": f"Contractor {rng.randint(1, 5000)}",
+        "PermitNumber": f"22-1-{200000 + i}",
+        "NumberOfSigns": str(rng.randint(1, 6)),
+        "StartDate": start,
+        "EndDate": _date(rng),
+        "StartTime": "7:00",
+        "EndTime": "18:00",
+        "24HourEnforcement": "N",
+        "SignID": str(i + 1),
+        "SideOfStreet": cp.side,
+        "location_desc": f"{cp.street}: {cp.cross_street}",
+        "address": f"{cp.street_num} {cp.street}",
+        "StreetFrontageFeet": str(rng.choice((20, 40, 60))),
+        "Latitude": str(cp.lat),
+        "Longitude": str(cp.lon),
+        "Location": f"({cp.lat}, {cp.lon})",
+    }
+
+
+def business_row(rng, i, cp):
+    return {
+        "Location Id": f"{1000000 + i}-01-001",
+        "Business Account Number": str(1000000 + i),
+        "DBA Name": f"Business {i + 1}",
+        "Street Address": f"{cp.street_num} {cp.street.title()}",
+        "City": "San Francisco",
+        "State": "CA",
+        "Source Zipcode": "94111",
+        "Location Start Date": _date(rng),
+        "Supervisor District": district(rng),
+        "Business Location": wkt_point(cp),
+    }
+
+
+class SyntheticTable:
+    fname: str = None
+    header: List[str] = None
+    make_row: Callable = None
+
+    def __init__(self, fname: str, header: List[str], make_row: Callable):
+        self.fname = fname
+        self.header = header
+        self.make_row = make_row
+
+
+tables = {
+    "meters": SyntheticTable(
+        "Parking_Meters.tsv",
+        ["POST_ID", "PARKING_SPACE_ID", "ACTIVE_METER_FLAG", "SMART_METER_FLAG", "METER_TYPE",
+         "CAP_COLOR", "STREET_NUM", "STREET_NAME", "LONGITUDE", "LATITUDE", "Current Supervisor Districts"],
+        meter_row),
+    "blue_zones": SyntheticTable(
+        "Accessible_Curb__Blue_Zone_.tsv",
+        ["OBJECTID", "ADDRESS", "CROSSST", "SITEDETAIL", "SPACELENG", "STSIDE", "CURBQUAL", "POSTID",
+         "LASTFIELDC", "MTAB_DATE", "MTAB_MOTION", "GLOBALID", "MTAB_RESO_TEXT", "shape", "Neighborhoods",
+         "SF Find Neighborhoods", "Current Police Districts", "Current Supervisor Districts",
+         "Analysis Neighborhoods"],
+        blue_zone_row),
+    "ramps": SyntheticTable(
+        "Curb_Ramps.tsv",
+        ["ocID", "positionOnReturn", "conditionScore", "crExist", "crPossible", "curbReturnLoc",
+         "detectableSurf", "flushToCorner", "heavyTraffic", "insideCrosswalk", "levelLandBottom",
+         "levelLandTop", "lipTooHigh", "Latitude", "Longitude"],
+        ramp_row),
+    "permits": SyntheticTable(
+        "Parking_Signs___Street_Space_Permits.tsv",
+        ["DateTimeEntered", "DateTimePosted", "UpdatedOn", "Category", "Source", "SignType", "CompanyName",
+         "CompanyPhone", "PermitNumber", "NumberOfSigns", "StartDate", "EndDate", "StartTime", "EndTime",
+         "Notes", "24HourEnforcement", "SignID", "SideOfStreet", "location_desc", "address", "cnn",
+         "StreetFrontageFeet", "Block", "Lot", "Latitude", "Longitude", "Location", "SignLink",
+         "AllDataLink", "StreetFrontageName", "StreetFrontageFrom", "StreetFrontageTo"],
+        permit_row),
+    "businesses": SyntheticTable(
+        "Registered_Business_Locations_-_San_Francisco.tsv.gz",
+        ["Location Id", "Business Account Number", "Ownership Name", "DBA Name", "Street Address", "City",
+         "State", "Source Zipcode", "Business Start Date", "Business End Date", "Location Start Date",
+         "Location End Date", "Mail Address", "Mail City", "Mail Zipcode", "Mail State", "NAICS Code",
+         "NAICS Code Description", "Parking Tax", "Transient Occupancy Tax", "LIC Code",
+         "LIC Code Description", "Supervisor District", "Neighborhoods - Analysis Boundaries",
+         "Business Corridor", "Business Location"],
+        business_row),
+}
+
+
+def _open_out(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _out_path(out_dir: str, fname: str, use_gzip: bool) -> str:
+    if use_gzip and not fname.endswith(".gz"):
+        fname += ".gz"
+    return os.path.join(out_dir, fname)
+
+
+def write_table(name: str, rows: int, out_dir: str, sampler: CurbSampler, rng: random.Random,
+                use_gzip: bool = False) -> str:
+    table = tables[name]
+    path = _out_path(out_dir, table.fname, use_gzip)
+    with _open_out(path) as fh:
+        fh.write("\ufeff" + "\t".join(table.header) + "\n")
+        for i in range(rows):
+            row = table.make_row(rng, i, sampler.sample())
+            fh.write("\t".join(row.get(h, "") for h in table.header) + "\n")
+    return path
+
+
+def write_transactions(rows: int, meter_rows: int, out_dir: str, rng: random.Random,
+                       use_gzip: bool = False) -> str:
+    """
+    POST_ID, date, count, with no header line, like data/post_transactions_battery.tsv
+    """
+    path = _out_path(out_dir, "post_transactions_battery.tsv", use_gzip)
+    with _open_out(path) as fh:
+        for _ in range(rows):
+            fh.write(f"{post_id(rng.randrange(meter_rows))}\t"
+                     f"{rng.randint(2017, 2022)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}\t"
+                     f"{rng.randint(1, 12)}\n")
+    return path
+
+
+def main():
+    dataset_names = list(tables.keys()) + ["transactions"]
+    parser = argparse.ArgumentParser(description="Write synthetic SF Data TSVs for load testing")
+    parser.add_argument("-n", "--rows", type=int, default=10000, help="rows per dataset")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--out", default="output/synthetic", help="output directory")
+    parser.add_argument("-z", "--gzip", action="store_true", help="write .tsv.gz")
+    parser.add_argument("-d", "--datasets", nargs="+", choices=dataset_names, default=dataset_names)
+    parser.add_argument("-b", "--within", nargs="+", choices=list(boundaries.keys()),
+                        default=["cbd_fidi", "cbd_jackson", "battery_westward", "district_3"],
+                        help="boundaries to spread points across, weighted by area")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    rng = random.Random(args.seed)
+    sampler = CurbSampler(rng, args.within)
+    for name in args.datasets:
+        if name == "transactions":
+            path = write_transactions(args.rows, args.rows, args.out, rng, args.gzip)
+        else:
+            path = write_table(name, args.rows, args.out, sampler, rng, args.gzip)
+        print(f"{path}\t{args.rows:,} rows")
+    if sampler.drawn:
+        print(f"{sampler.drawn - sampler.kept:,} of {sampler.drawn:,} sampled points rejected "
+              f"({(sampler.drawn - sampler.kept) / sampler.drawn:.1%}), "
+              f"{sampler.on_grid:,} of {sampler.kept:,} kept on synthetic grid streets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3.10
+"""
+Filter / group-by / count over the SF Data tables in ./data, with boundary
+membership from defs.boundaries as a first-class predicate.
+
+From Python:
+    run_query("meters", where=["CAP_COLOR=Yellow", "STREET_NAME=BATTERY ST", "STREET_NUM:even"],
+              within=["cbd_fidi"])
+
+which, on a small in-memory Table, evaluates as:
+    >>> t = Table("meters", (0, 0), [{"CAP_COLOR": "Yellow", "STREET_NUM": "102"},
+    ...                              {"CAP_COLOR": "Yellow", "STREET_NUM": "1A"},
+    ...                              {"CAP_COLOR": "Grey", "STREET_NUM": "104"}], [None] * 3)
+    >>> _evaluate(t, *normalize_query("meters", ["CAP_COLOR=yellow", "STREET_NUM:even"])[1:])
+    {(): 1}
+    >>> _evaluate(t, *normalize_query("meters", group_by=["CAP_COLOR"])[1:])
+    {('Yellow',): 2, ('Grey',): 1}
+
+From the shell:
+    $ ./query.py meters -w CAP_COLOR=Yellow -w "STREET_NAME=BATTERY ST" -w STREET_NUM:even -b cbd_fidi
+    $ ./query.py meters -b "cbd_fidi|cbd_jackson" -g CAP_COLOR
+    $ ./query.py meters -w "STREET_NAME=BATTERY ST" -b battery_qb -g STREET_SIDE -g CAP_COLOR
+    $ ./query.py -i    # one query per line on stdin, sharing the in-process caches
+    $ ./query.py -i meters -b cbd_fidi    # ... each line defaulting to meters in cbd_fidi
+
+Each table is parsed once per file version (mtime & size), boundary membership
+is computed once per table & boundary, and query results are memoized in an
+LRU cache keyed on the normalized query plus the dataset version.
+"""
+
+import argparse
+from collections import OrderedDict, defaultdict
+import logging
+import os
+import shlex
+import sys
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from shapely.geometry import Point
+from shapely.prepared import prep
+
+from block_faces import block_face_index
+from defs.boundaries import boundaries
+from utils import load_tsv, wkt_to_kml, DictObj
+
+
+logger = logging.getLogger(__name__)
+
+query_cache_size = 256
+
+
+def lonlat_point(lon_field: str, lat_field: str) -> Callable:
+    def point_of(row):
+        try:
+            return float(row[lon_field]), float(row[lat_field])
+        except (TypeError, ValueError):
+            return None
+    return point_of
+
+
+def wkt_point(shape_field: str) -> Callable:
+    def point_of(row):
+        try:
+            coords = wkt_to_kml(row[shape_field], None, True)["coords"]
+        except (AttributeError, ValueError):
+            return None
+        return coords[0] if coords else None
+    return point_of
+
+
+class Dataset:
+    path: str = None
+    point_of: Callable = None
+    derive: Callable = None
+
+    def __init__(self, path: str, point_of: Callable, derive: Callable = None):
+        self.path = path
+        self.point_of = point_of
+        self.derive = derive
+
+    def version(self) -> Tuple[int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+
+def add_block_faces(table):
+    """
+    Stores BLOCK_FACE and STREET_SIDE columns on the meter table, see block_faces.py
+    """
+    faces, sides = block_face_index(table.column("STREET_NAME"), table.points)
+    table.columns["BLOCK_FACE"] = faces
+    table.columns["STREET_SIDE"] = sides
+
+
+datasets = DictObj({
+    "meters": Dataset("data/Parking_Meters.tsv", lonlat_point("LONGITUDE", "LATITUDE"), derive=add_block_faces),
+    "blue_zones": Dataset("data/Accessible_Curb__Blue_Zone_.tsv", wkt_point("shape")),
+    "ramps": Dataset("data/Curb_Ramps.tsv", lonlat_point("Longitude", "Latitude")),
+    "permits": Dataset("data/Parking_Signs___Street_Space_Permits.tsv", lonlat_point("Longitude", "Latitude")),
+})
+
+
+class Table:
+    """
+    One dataset loaded into memory: its rows, each row's (lon, lat) point, and
+    lazily-built column lists & boundary membership lists, all index-aligned.
+    Derived columns, such as the meters' BLOCK_FACE & STREET_SIDE, are stored
+    in columns when the table is loaded.
+    """
+    def __init__(self, name: str, version: Tuple[int, int], rows: List[dict], points: List[Optional[tuple]]):
+        self.name = name
+        self.version = version
+        self.rows = rows
+        self.points = points
+        self.columns = {}
+        self.membership = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, field: str) -> list:
+        if field not in self.columns:
+            if self.rows and field not in self.rows[0]:
+                raise KeyError(f"No column {field!r} in {self.name}")
+            self.columns[field] = [r[field] for r in self.rows]
+        return self.columns[field]
+
+    def within(self, boundary_name: str) -> List[bool]:
+        if boundary_name not in self.membership:
+            if boundary_name not in boundaries:
+                raise KeyError(f"No boundary named {boundary_name!r}")
+            bdy = prep(boundaries[boundary_name].b)
+            self.membership[boundary_name] = [
+                p is not None and bdy.contains(Point(p)) for p in self.points]
+        return self.membership[boundary_name]
+
+
+_tables = {}
+
+
+def load_table(name: str) -> Table:
+    """
+    Returns the in-memory Table for dataset :name:, re-reading the file only
+    when its version has changed since the last load.
+    """
+    if name not in datasets:
+        raise KeyError(f"No dataset named {name!r}; choose from {', '.join(datasets)}")
+    ds = datasets[name]
+    version = ds.version()
+    table = _tables.get(name)
+    if table is None or table.version != version:
+        rows = list(load_tsv(ds.path))
+        table = Table(name, version, rows, [ds.point_of(r) for r in rows])
+        if ds.derive:
+            ds.derive(table)
+        _tables[name] = table
+    return table
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = query_cache_size):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = 0
+
+
+query_cache = LRUCache()
+
+
+def _as_int(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# Comparisons are case-insensitive; parity is False for non-numeric values
+predicate_ops = {
+    "=": lambda v, arg: (v or "").casefold() == arg.casefold(),
+    "!=": lambda v, arg: (v or "").casefold() != arg.casefold(),
+    "~": lambda v, arg: arg.casefold() in (v or "").casefold(),
+    ":even": lambda v, arg: _as_int(v) is not None and _as_int(v) % 2 == 0,
+    ":odd": lambda v, arg: _as_int(v) is not None and _as_int(v) % 2 == 1,
+}
+
+
+def parse_predicate(text: str) -> Tuple[str, str, str]:
+    """
+    Parses "FIELD=value", "FIELD!=value", "FIELD~substring", "FIELD:even" or
+    "FIELD:odd" into a (field, op, arg) tuple. The field ends at the first
+    operator, so the value may itself contain operator characters.
+    >>> parse_predicate("STREET_NAME=BATTERY ST")
+    ('STREET_NAME', '=', 'BATTERY ST')
+    >>> parse_predicate("STREET_NUM:even")
+    ('STREET_NUM', ':even', '')
+    >>> parse_predicate("DBA Name~A=B")
+    ('DBA Name', '~', 'A=B')
+    >>> parse_predicate("DBA Name!=A~B")
+    ('DBA Name', '!=', 'A~B')
+    """
+    found = [(text.find(op), op) for op in ("!=", "=", "~") if op in text]
+    if found:
+        pos, op = min(found)  # "!=" sorts before the "=" inside it at pos + 1
+        if pos > 0:
+            return text[:pos], op, text[pos + len(op):]
+    else:
+        for op in (":even", ":odd"):
+            if text.endswith(op) and len(text) > len(op):
+                return text[:-len(op)], op, ""
+    raise ValueError(f"Can't parse predicate: {text!r}")
+
+
+def _normalize_predicate(pred) -> Tuple[str, str, str]:
+    field, op, arg = parse_predicate(pred) if isinstance(pred, str) else tuple(pred)
+    if op in ("=", "!=", "~"):
+        arg = arg.casefold()
+    return field, op, arg
+
+
+def normalize_query(dataset: str, where: Iterable = (), within: Iterable = (),
+                    group_by: Iterable = ()) -> tuple:
+    """
+    Equivalent queries normalize to the same key: predicate & boundary order
+    don't matter, nor does the case of compared values; group-by order does
+    since it orders the result keys.
+    >>> normalize_query("meters", ["STREET_NUM:odd", "CAP_COLOR=Red"], ["b|a"])
+    ('meters', (('CAP_COLOR', '=', 'red'), ('STREET_NUM', ':odd', '')), (('a', 'b'),), ())
+    """
+    preds = {_normalize_predicate(w) for w in where}
+    bdys = {tuple(sorted(set(b.split("|")))) if isinstance(b, str) else tuple(sorted(set(b))) for b in within}
+    return dataset, tuple(sorted(preds)), tuple(sorted(bdys)), tuple(group_by)
+
+
+def _evaluate(table: Table, preds: tuple, bdys: tuple, group_by: tuple) -> dict:
+    selected = range(len(table))
+    for any_of in bdys:
+        masks = [table.within(b) for b in any_of]
+        selected = [i for i in selected if any(m[i] for m in masks)]
+    for field, op, arg in preds:
+        fn = predicate_ops[op]
+        col = table.column(field)
+        selected = [i for i in selected if fn(col[i], arg)]
+
+    counts = defaultdict(int)
+    cols = [table.column(g) for g in group_by]
+    for i in selected:
+        counts[tuple(c[i] for c in cols)] += 1
+    if not group_by:
+        counts[()] += 0
+    return dict(counts)
+
+
+def run_query(dataset: str, where: Iterable = (), within: Iterable = (),
+              group_by: Iterable = ()) -> dict:
+    """
+    Counts rows of :dataset: matching every predicate in :where: and inside
+    every boundary in :within:, grouped by the :group_by: columns.
+    :param dataset: a key of datasets: meters, blue_zones, ramps, permits
+    :param where: predicate strings, see parse_predicate()
+    :param within: boundary names from defs.boundaries; "a|b" means inside a or b
+    :param group_by: column names
+    :return: dict of group-by value tuple -> count, {(): count} without group_by
+    """
+    key = normalize_query(dataset, where, within, group_by)
+    if dataset not in datasets:
+        raise KeyError(f"No dataset named {dataset!r}; choose from {', '.join(datasets)}")
+    versioned_key = (key, datasets[dataset].version())
+    result = query_cache.get(versioned_key)
+    if result is None:
+        _, preds, bdys, group_by = key
+        result = _evaluate(load_table(dataset), preds, bdys, group_by)
+        query_cache.put(versioned_key, result)
+    return dict(result)
+
+
+def print_result(result: dict, group_by: List[str]):
+    if group_by:
+        print("\t".join(group_by) + "\tCount")
+    tot = 0
+    for k in sorted(result.keys(), key=lambda x: tuple(v or "" for v in x)):
+        if group_by:
+            print("\t".join(v or "" for v in k) + f"\t{result[k]}")
+        tot += result[k]
+    print(f"Total: {tot}")
+
+
+def make_arg_parser():
+    parser = argparse.ArgumentParser(description="Filter, group & count SF Data tables within boundaries")
+    parser.add_argument("dataset", nargs="?", choices=list(datasets.keys()),
+                        help="required unless -i is given, when it's the default for each line")
+    parser.add_argument("-w", "--where", action="append", default=[],
+                        help="FIELD=value, FIELD!=value, FIELD~substring, FIELD:even or FIELD:odd")
+    parser.add_argument("-b", "--within", action="append", default=[],
+                        help="boundary name from defs.boundaries; 'a|b' means inside either")
+    parser.add_argument("-g", "--group-by", action="append", default=[], help="column to group counts by")
+    parser.add_argument("-i", "--interactive", action="store_true",
+                        help="read one query per line from stdin; -w, -b & -g given here apply to every line")
+    return parser
+
+
+def run_args(parser, args, base=None):
+    """
+    Runs the query in :args:, with :base:'s dataset as the default and its
+    where, within & group-by prepended, as in interactive mode.
+    """
+    dataset, where, within, group_by = args.dataset, args.where, args.within, args.group_by
+    if base is not None:
+        dataset = dataset or base.dataset
+        where, within, group_by = base.where + where, base.within + within, base.group_by + group_by
+    if dataset is None:
+        parser.error("a dataset is required")
+    try:
+        result = run_query(dataset, where, within, group_by)
+    except (KeyError, ValueError) as ex:
+        parser.error(ex.args[0])
+    print_result(result, group_by)
+
+
+def main(argv):
+    parser = make_arg_parser()
+    args = parser.parse_args(argv)
+    if not args.interactive:
+        run_args(parser, args)
+        return
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            line_args = parser.parse_args(shlex.split(line))
+            if line_args.interactive:
+                parser.error("-i can't be given on an interactive line")
+            run_args(parser, line_args, base=args)
+        except SystemExit:
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
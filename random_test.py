@@ -5,32 +5,26 @@ import sys
 import re
 import simplekml
 import argparse
-import random
+
+from kml_styles import line_palette_size, random_color, round_coords, style_registry
 
 
 def split_lines(wkt):
     return re.findall(r"LINESTRING\(([^)]*)", wkt)
 
 
-def random_color():
-    r = lambda: random.randint(0, 255)
-    r()
-    return '#FF{:02X}{:02X}{:02X}'.format(r(), r(), r())
-
-
-def create_lines(lines, colors):
+def create_lines(lines, colors, precision=None):
     kml = simplekml.Kml()
     for idx, l in enumerate(lines):
         splitted = re.findall(r"[^ ,]+", l)
         spl = [float(i) for i in splitted]
-        coords = zip(splitted[::2], splitted[1::2])
+        coords = round_coords(zip(spl[::2], spl[1::2]), precision)
 
         ls = kml.newlinestring(name='Line ' + str(idx))
         ls.coords = coords
 
         if colors:
-            ls.style.linestyle.color = random_color()
-            ls.style.linestyle.width = 4
+            ls.style = style_registry.linestyle(random_color(), 4)
 
     return kml
 
@@ -39,7 +33,10 @@ def create_lines(lines, colors):
 parser = argparse.ArgumentParser(description='Converter of WKT\'s linestrings to KML')
 parser.add_argument('infile', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
 parser.add_argument('outfile', nargs='?', type=argparse.FileType('w'), default=sys.stdout)
-parser.add_argument('-c', '--colors', action='store_true', help='add random colors to the lines for easy differentiation')
+parser.add_argument('-c', '--colors', action='store_true', help=f'add random colors to the lines for easy differentiation; colors come from a fixed '
+                         f'palette of {line_palette_size} so lines share styles, and any two lines '
+                         f'have a 1 in {line_palette_size} chance of the same color')
+parser.add_argument('-p', '--precision', type=int, default=None, help='decimal places to round coordinates to')
 
 args = parser.parse_args()
 
@@ -47,5 +44,5 @@ wkt = args.infile.read()
 
 lines = split_lines(wkt)
 
-kml = create_lines(lines, args.colors)
+kml = create_lines(lines, args.colors, args.precision)
 args.outfile.write(kml.kml())
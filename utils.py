@@ -5,11 +5,12 @@ import json
 import logging
 import re
 from math import radians, cos, sin
-import random
 
 import simplekml
 from shapely.geometry import Polygon
 
+from kml_styles import random_color, round_coords, style_registry
+
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,7 @@ def load_tsv(fname: str, show_count_every=0):
         p = 0
         while ord(fields_line[p]) >= 128:
             p += 1
-        fields = fields_line[p:].split("\t")
+        fields = fields_line[p:].rstrip("\r\n").split("\t")
         reader = csv.DictReader(fh, fields, delimiter="\t")
         for row in reader:
             # if show_count_every and c / show_count_every == int(c / show_count_every):
@@ -55,30 +56,6 @@ def load_boundary_file(fname, pruncate=0) -> Polygon:
     return Polygon(shell=[(p[0], p[1]) for p in obj["coordinates"][0][pruncate:]])
 
 
-def make_stylemap(cols_widths: dict):  # norm_col, norm_width, hi_col, hi_width
-    sm = K.StyleMap()
-    norm = K.Style()
-    norm.linestyle.color = cols_widths["ncol"]
-    norm.linestyle.width = cols_widths["nwidth"]
-    norm.polystyle.color = cols_widths["ncol"]
-    norm.polystyle.fill = 1
-    norm.polystyle.outline = 1
-    sm.normalstyle = norm
-    hilite = K.Style()
-    hilite.linestyle.color = cols_widths["hcol"]
-    hilite.linestyle.width = cols_widths["hwidth"]
-    hilite.polystyle.color = cols_widths["hcol"]
-    hilite.polystyle.fill = 1
-    hilite.polystyle.outline = 1
-    sm.highlightstyle = hilite
-    return sm
-
-
-def random_color():
-    r = lambda: random.randint(0, 255)
-    return '#FF{:02X}{:02X}{:02X}'.format(r(), r(), r())
-
-
 def wkt_to_kml(wkt, doc, dry=False):
     if not wkt:
         return {"type": "", "coords": ""}
@@ -90,9 +67,8 @@ def wkt_to_kml(wkt, doc, dry=False):
 
     if not dry:
         K = doc.newlinestring(name="abc")
-        K.coords = coords
-        K.style.linestyle.color = random_color()
-        K.style.linestyle.width = 12
+        K.coords = round_coords(coords)
+        K.style = style_registry.linestyle(random_color(), 12)
     return {"type": parts.group(1), "coords": coords}
 
 